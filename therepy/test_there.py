@@ -1,5 +1,40 @@
 from .there import *
 import random
+import pytest
+import gzip
+import asyncio
+
+
+@pytest.fixture
+def written(tmp_path):
+  "Return a function that writes `txt` to file `name` (in `tmp_path`)."
+  def write(name, txt):
+    f = str(tmp_path / name)
+    with open(f, "w") as fp:
+      fp.write(txt)
+    return f
+  return write
+
+
+def trained(rows):
+  "Return a `Seen` trained on all of `rows`."
+  seen = Seen(rows)
+  [seen.train(z) for z in rows.all]
+  return seen
+
+
+def guesses(rows, word=lambda y: y):
+  "Train on all of `rows`, then return the guessed class of each."
+  seen = trained(rows)
+  return [word(seen.guess(z)[0]) for z in rows.all]
+
+
+def same_bins(b1, b2, cols=None):
+  "Check two `bins` agree (decoding interned symbols from `cols`)."
+  for x in b1:
+    word = getattr(cols[x], "word", lambda z: z) if cols else lambda z: z
+    assert [(b.xlo, b.xhi, b.val) for b in b1[x]] == \
+        [(word(b.xlo), word(b.xhi), b.val) for b in b2[x]]
 
 
 def test_struct():
@@ -17,6 +52,105 @@ def test_csv():
   assert n == 399
 
 
+def test_bulk():
+  for src in [auto93, diabetes, soybean]:
+    assert list(csv(src)) == list(csv(src, bulk=True, chunk=64))
+  assert len(Rows(auto93, bulk=True).all) == 398
+
+
+def test_pushdown():
+  for bulk in [False, True]:
+    rows = list(csv(diabetes, bulk=bulk, use=["$plas", "!class"],
+                    where={"!class": "tested_positive", "$age": (30, 40)}))
+    assert rows[0] == ["$plas", "!class"]
+    assert len(rows) == 83
+    assert all(len(row) == 2 and row[1] == "tested_positive"
+               for row in rows[1:])
+    rows = list(csv(diabetes, bulk=bulk, use=["nothing"], where={"$age": 21}))
+    assert rows == [[]] * 64
+  r = Rows(auto93, where={"cylinders": "4"})
+  assert len(r.all) == 204 and r.cols.all[0].mode == "4"
+
+
+def test_mapped(written):
+  f = written("auto93.csv", auto93)
+  want = list(csv(auto93))
+  assert list(csv(f, mapped=True)) == want
+  assert list(csv(f, mapped=True, bulk=True, chunk=64)) == want
+  assert len(Rows(f, mapped=True).all) == 398
+
+
+def test_zipped(tmp_path):
+  f = str(tmp_path / "auto93.csv.gz")
+  with gzip.open(f, "wt") as fp:
+    fp.write(auto93)
+  want = list(csv(auto93))
+  assert list(csv(f)) == want
+  assert list(csv(f, bulk=True, mapped=True)) == want
+  assert len(Rows(f).all) == 398
+
+
+def test_tail(written):
+  lines = weather.strip().splitlines()
+  f = written("weather.csv", "\n".join(lines[:5]) + "\n" + lines[5][:3])
+  tail, rows = Tail(f), Rows()
+  assert tail.update(rows) == 4
+  seen = Seen(rows)
+  with open(f, "a") as fp:
+    fp.write(lines[5][3:] + "\n" + "\n".join(lines[6:]) + "\n")
+  assert tail.update(rows, seen) == 9 and seen.n == 9
+  assert len(rows.all) == 13 and rows.cols.all[1].n == 13
+  assert tail.update(rows, seen) == 0
+
+
+def test_pipeline(written):
+  f = written("diabetes.csv", diabetes)
+  a, s = Abcd(), Seen(Rows())
+  r = asyncio.run(pipeline(f, seen=s, size=2, chunk=512,
+                           out=lambda row, y: a(row[-1], y)))
+  assert len(r.all) == s.n == 768 and a.yes + a.no == 767
+  async def fed(bins):
+    stream = asyncio.StreamReader()
+    stream.feed_data(weather.encode())
+    stream.feed_eof()
+    return await pipeline(stream, bins=bins)
+  r = asyncio.run(fed(Rows(weather).bins()))
+  assert len(r.all) == 13 and 0 < r.all[0].bins[1] <= 1
+
+
+def test_cached(written):
+  f = written("auto93.csv", auto93)
+  r1, r2 = cached(f), cached(f)
+  assert [r.cells for r in r1.all] == [r.cells for r in r2.all]
+  for c1, c2 in zip(r1.cols.all, r2.cols.all):
+    assert c1.__dict__ == c2.__dict__
+  assert Rows().load(f + ".rows", key="stale") is None
+  assert len(cached(f, use=["cylinders", "$model"]).cols.all) == 2
+  assert len(cached(f, use=["cylinders", "$model"]).cols.all) == 2
+  assert cached(f, intern=True).all[0][0] == cached(f, intern=True).all[0][0]
+  r1.save(f + ".rows")
+  assert isinstance(Columns().load(f + ".rows").all[0], View)
+  assert isinstance(Rows(sparse=True).load(f + ".rows").all[0], Sparse)
+
+
+def test_merge():
+  a = [9, 2, 5, 4, 12, 7, 8, 11, 9, 3, 7, 4, 12, 5, 4, 10, 9, 6, 9, 4]
+  n = Num(all=a[:7]).merge(Num(all=a[7:]))
+  assert n.n == 20 and abs(n.mu - 7) < 10**-9
+  assert 3.06 <= n.sd <= 3.07 and n.lo == 2 and n.hi == 12
+  s = Sym(all="aab").merge(Sym(all="bbc"))
+  assert s.n == 6 and s.mode == "b" and s.seen["a"] == 2
+
+
+def test_parallel(written):
+  f = written("diabetes.csv", diabetes)
+  r1, r2 = Rows(f), parallel(f, jobs=3)
+  assert [r.cells for r in r1.all] == [r.cells for r in r2.all]
+  for c1, c2 in zip(r1.cols.nums, r2.cols.nums):
+    assert abs(c1.mu - c2.mu) < 10**-6 and abs(c1.sd - c2.sd) < 10**-6
+  assert r1.cols.klass.seen == r2.cols.klass.seen
+
+
 def test_num():
   n = Num(all=[9, 2, 5, 4, 12, 7, 8, 11, 9, 3,
                7, 4, 12, 5, 4, 10, 9, 6, 9, 4])
@@ -24,6 +158,33 @@ def test_num():
   assert(3.06 <= n.sd <= 3.07)
 
 
+def test_adds():
+  a = [9, 2, 5, 4, 12, 7, 8, 11, 9, 3, 7, 4, 12, 5, 4, 10, 9, 6, "?"]
+  n1, n2 = Num(all=a), Num()
+  n2.adds(a[:5])
+  n2.adds(a[5:])
+  assert n1.n == n2.n and n1.lo == n2.lo and n1.hi == n2.hi
+  assert abs(n1.mu - n2.mu) < 10**-9 and abs(n1.sd - n2.sd) < 10**-9
+  for lst in ["abbaac", "cbbaca", "?xyyx"]:
+    s1, s2 = Sym(all=lst), Sym()
+    s2.adds(lst[:2])
+    s2.adds(lst[2:])
+    assert (s1.n, s1.seen, s1.mode) == (s2.n, s2.seen, s2.mode)
+
+
+def test_extend():
+  r1, rows = Rows(auto93), list(csv(auto93))
+  r2 = Rows()
+  r2.header(rows[0])
+  r2.extend(rows[1:200]).extend(rows[200:])
+  r3 = Columns().fromArrays(rows[0], list(zip(*rows[1:])))
+  for r in [r2, r3]:
+    assert [z.cells for z in r.all] == [z.cells for z in r1.all]
+    for c1, c2 in zip(r1.cols.all, r.cols.all):
+      assert c1.n == c2.n and getattr(c1, "mode", 0) == getattr(c2, "mode", 0)
+      assert abs(getattr(c1, "sd", 0) - getattr(c2, "sd", 0)) < 10**-6
+
+
 def test_rows():
   r = Rows(auto93)
   print(r.cols.nums[1])
@@ -31,6 +192,352 @@ def test_rows():
   assert len(r.all) == 398
 
 
+def test_schema():
+  s = Schema(["a", "$b", "?c", "<d", "!e"])
+  assert s.keep == [0, 1, 3, 4] and s.num == [0, 1, 0, 1, 0]
+  assert s.w[3] == -1 and s.klass == 4 and s.goal == [0, 0, 0, 1, 1]
+  r = Rows(weather)
+  r1 = r.clone(r.all)
+  assert r1.schema is r.schema and r1.cols.klass.pos == 4
+  assert r1.cols.all[1].mu == r.cols.all[1].mu
+
+
+def test_columns():
+  r1, r2 = Rows(auto93), Columns(auto93)
+  assert [r.cells for r in r1.all] == [r.cells for r in r2.all]
+  assert r2.cell(0, 2) == 193 and r2.all[0][2] == 193
+  r1.bins(40.0)
+  r2.bins(40.0)
+  for a, b in zip(r1.all, r2.all):
+    assert a.bins == [b.bins[k] for k in range(len(a.bins))]
+  assert isinstance(r2.clone(r2.all[:5]), Columns)
+  for kw in [dict(sparse=True), dict(intern=True)]:
+    with pytest.raises(ValueError):
+      Columns(**kw)
+
+
+def test_compact():
+  r1 = Rows(auto93)
+  for kw in [dict(floats="f"), dict(ints=True), dict(floats="f", ints=True)]:
+    r2 = Columns(auto93, **kw)
+    for a, b in zip(r1.all, r2.all):
+      assert all(x == y or abs(x - y) < 10**-6 * abs(x)
+                 for x, y in zip(a.cells, b.cells))
+    for c1, c2 in zip(r1.cols.nums, r2.cols.nums):
+      assert c1.mu == c2.mu and c1.sd == c2.sd
+    assert r2.clone(r2.all[:3]).options() == r2.options()
+  assert sorted(r2.whole) == [2, 3, 5, 6] and r2.data[1].typecode == "f"
+  r2.row([8, 1.5, "?", 4000.5, 12, 82, 20])
+  assert 3 not in r2.whole and r2.all[-1][3] == 4000.5
+  assert r2.all[-1][2] == "?" and r2.all[0][3] == 4732
+
+
+def test_row():
+  r = Rows(auto93)
+  a, b = r.all[0], r.all[1]
+  assert not hasattr(a, "__dict__") and a.bins is a.cells
+  assert 0 <= a.dist(b) <= 1 and a.dist(a) == 0
+  r.bins(40.0)
+  assert a.bins is not a.cells and a.bins[0] == a.cells[0]
+  assert "cells" in repr(a)
+
+
+def test_shared():
+  r = Rows(weather)
+  s = Seen(r)
+  [s.train(row) for row in r.all]
+  yes = s.ys["yes"]
+  assert len(yes.all) == 9 and yes.cols.klass.n == 9
+  assert all(any(a is b for b in r.all) for a in yes.all)
+  c = r.clone(r.all[:3])
+  assert c.all[2] is r.all[2]
+  c.bins()
+  assert r.all[2].bins is c.all[2].bins and r.all[2].bins != r.all[2].cells
+
+
+def test_subset():
+  r = Rows(diabetes)
+  s = r.some(range(0, 768, 2))
+  assert s._cols is None and len(s.all) == 384 and s.all[1] is r.all[2]
+  c = r.clone(r.all[0::2])
+  assert s.cols.all[1].mu == c.cols.all[1].mu
+  assert s.cols.klass.seen == c.cols.klass.seen
+  s2 = s.some([0, 1])
+  assert s2.all[1] is r.all[2] and s2._parent is r
+  row = r.all[5]
+  assert s.like(row, 768, 2, 1, 2) == c.like(row, 768, 2, 1, 2)
+  for stream in [Window(diabetes, size=50), Reservoir(diabetes, size=50)]:
+    with pytest.raises(TypeError):
+      stream.some([0, 1])
+
+
+def test_frame():
+  np = pytest.importorskip("numpy")
+  pytest.importorskip("pandas")
+  r = Rows(auto93)
+  df = r.toFrame()
+  for r2 in [Rows().fromFrame(df), Columns().fromFrame(df)]:
+    assert [z.cells for z in r2.all] == [z.cells for z in r.all]
+    assert abs(r2.cols.all[2].mu - r.cols.all[2].mu) < 10**-9
+  c = Columns().fromFrame(df)
+  assert np.shares_memory(c.toArrays()["$model"], df["$model"].to_numpy())
+  c, keep = Columns(auto93), []
+  keep += [c.toArrays()]
+  c.row(r.all[0].cells)
+  assert len(keep[0]["$model"]) == 398 and len(c.toArrays()["$model"]) == 399
+  a = np.array([(1.0, "a", 0), (np.nan, "b", 1)],
+               dtype=[("$x", "f8"), ("!y", "O"), ("?z", "i4")])
+  assert [z.cells for z in Rows().fromFrame(a).all] == [[1.0, "a"], ["?", "b"]]
+  c = Columns().fromFrame(a[1:])
+  assert c.cols.all[0].miss == 1 and c.cols.all[0].n == 0
+  assert type(Columns().fromFrame(a).all[0][0]) is float
+  c = Columns(dedupe=True).fromFrame(np.concatenate([a, a]))
+  assert len(c.all) == 2 and c.all[0].w == 2 and c.total() == 4
+
+
+def test_sqlite():
+  r, q = Rows(auto93), Sqlite(auto93, page=50)
+  assert q.__dict__.get("all") is None and len(q.all) == 398
+  assert [z.cells for z in r.all] == [z.cells for z in q.all]
+  assert q.all[-1].cells == r.all[-1].cells
+  assert q.cols.all[2].mu == r.cols.all[2].mu
+  b1, b2 = r.bins(40.0), q.bins(40.0)
+  for x in b1:
+    assert [(b.x, b.xlo, b.xhi) for b in b1[x]] == \
+        [(b.x, b.xlo, b.xhi) for b in b2[x]]
+  assert [z.bins for z in r.all] == [z.bins for z in q.all]
+  with pytest.raises(IndexError):
+    q.all[398]
+  assert guesses(Rows(weather)) == guesses(Sqlite(weather))
+  lst = list(csv(diabetes))
+  r = Rows(lst + lst[1:], dedupe=True)
+  q = Sqlite()
+  q.header(r.schema)
+  q.extend(r.all)
+  assert q.total() == r.total() == 1536 and q.cols.all[1].n == 1536
+  assert len(q.all) == 768 and q.all[0].w == 2
+  same_bins(r.bins("tested_positive"), q.bins("tested_positive"))
+
+
+def test_lazy(tmp_path):
+  r1, r2 = Rows(diabetes), Rows(diabetes, lazy=True)
+  assert all("mu" not in col.__dict__ for col in r2.cols.nums)
+  assert r2.cols.all[1].mu == r1.cols.all[1].mu
+  assert "mu" not in r2.cols.all[2].__dict__
+  r2.save(tmp_path / "rows")
+  r3 = Rows().load(tmp_path / "rows")
+  assert abs(r3.cols.all[2].mu - r1.cols.all[2].mu) < 10**-9
+  r1.row(r1.all[0].cells)
+  r2.row(r2.all[0].cells)
+  assert r2.cols.all[1].n == r1.cols.all[1].n == 769
+  assert abs(r2.cols.all[2].sd - r1.cols.all[2].sd) < 10**-9
+  assert guesses(r1) == guesses(r2)
+
+
+def test_dedupe(written):
+  lst = list(csv(diabetes))
+  lst = lst + lst[1:] + lst[1:100]
+  r1, r2 = Rows(lst), Rows(lst, dedupe=True)
+  assert len(r1.all) == 768 * 2 + 99 and len(r2.all) == 768
+  assert len(r1.all) == len(r2.all) + r2.dups
+  assert r2.all[0].w == 3 and r2.all[500].w == 2
+  for c1, c2 in zip(r1.cols.all, r2.cols.all):
+    assert c1.n == c2.n
+    assert abs(getattr(c1, "sd", 0) - getattr(c2, "sd", 0)) < 10**-6
+  same_bins(r1.bins("tested_positive"), r2.bins("tested_positive"))
+  s1, s2 = trained(r1), trained(r2)
+  a1, a2 = Abcd(), Abcd()
+  [a1(z[-1], s1.guess(z)[0]) for z in r1.all]
+  [a2(z[-1], s2.guess(z)[0], z.w) for z in r2.all]
+  assert a1.yes == a2.yes and a1.d == a2.d
+  sub = r2.some(range(len(r2.all)))
+  assert sub.cols.all[1].n == r2.cols.all[1].n and sub.total() == r2.total()
+  sub = r2.some([0, 1])
+  n = sub.total()
+  sub.row(r2.all[5].cells)
+  assert sub.total() == n + 1
+  assert list(sub.idx) == [0, 1, 5] and sub.all[2] is r2.all[5]
+  lines = weather.strip().splitlines()
+  f = written("weather.csv", "\n".join(lines + lines[1:]) + "\n")
+  r = Rows(dedupe=True)
+  r.header(Rows(weather).schema)
+  s = Seen(r)
+  assert Tail(f).update(r, s) == 26 and s.n == r.total() == 26
+
+
+def test_sparse():
+  random.seed(1)
+  lst = [["$c%d" % k for k in range(99)] + ["!k"]]
+  for _ in range(500):
+    lst += [[round(random.random(), 2) if random.random() < .05 else "?"
+             for _ in range(99)] + [random.choice("ab")]]
+  r1, r2 = Rows(lst), Rows(lst, sparse=True)
+  assert [z.cells for z in r1.all] == [z.cells for z in r2.all]
+  assert len(r2.all[0].vals) < 20
+  for k in range(50):
+    assert abs(r1.all[k].dist(r1.all[k + 1]) -
+               r2.all[k].dist(r2.all[k + 1])) < 10**-9
+  assert guesses(r1) == guesses(r2)
+  same_bins(r1.bins("a"), r2.bins("a"))
+  assert [z.bins for z in r1.all] == [z.bins.cells if z.bins is z else
+                                      z.bins for z in r2.all]
+
+
+def test_intern(tmp_path):
+  r1, r2 = Rows(diabetes), Rows(diabetes, intern=True)
+  k = r2.cols.klass
+  assert set(k.seen) == {0, 1} and k.word(k.mode) == r1.cols.klass.mode
+  assert [z.cells for z in r1.all] == [r2.decode(z.cells) for z in r2.all]
+  assert guesses(r1) == guesses(r2, k.word)
+  same_bins(r1.bins("tested_positive"), r2.bins("tested_positive"),
+            r2.cols.all)
+  r2.save(tmp_path / "rows")
+  r3, r4 = Rows().load(tmp_path / "rows"), \
+      Rows(intern=True).load(tmp_path / "rows")
+  assert [z.cells for z in r3.all] == [z.cells for z in r1.all]
+  assert [z.cells for z in r4.all] == [z.cells for z in r2.all]
+  assert r3.cols.klass.seen == r1.cols.klass.seen
+
+
+def test_missing():
+  random.seed(1)
+  lst = list(csv(diabetes))
+  body = [[("?" if random.random() < .3 else v) for v in z[:-1]] + [z[-1]]
+          for z in lst[1:]]
+  r, lazy = Rows([lst[0]] + body), Rows([lst[0]] + body, lazy=True)
+  for col, col2 in zip(r.cols.all, lazy.cols.all):
+    assert col.miss == col2.miss == sum(z[col.pos] == "?" for z in body)
+    assert sum(r.missing(col.pos)) == col.miss
+    assert len(r.has(col.pos)) == len(body) - col.miss
+  r.row(["?"] * 8 + ["tested_positive"])
+  assert len(r.missing(0)) == len(r.all) and r.missing(0)[-1] == 1
+  assert r.cols.all[0].miss == sum(r.missing(0))
+  two = Rows([lst[0]] + body[:300]).cols.all[0]
+  two.merge(Rows([lst[0]] + body[300:]).cols.all[0])
+  assert two.miss == r.cols.all[0].miss - 1
+  r.bins("tested_positive")
+  shuffle(r.all)
+  r.bins("tested_positive")
+  assert sum(r.missing(0)) == r.cols.all[0].miss
+
+
+def test_window(tmp_path, written):
+  lst = list(csv(auto93))
+  for kw in [dict(), dict(lazy=True)]:
+    w, r = Window(lst, size=50, **kw), Rows([lst[0]] + lst[-50:])
+    assert len(w.all) == 50 and w.all[0] is not None
+    for a, b in zip(w.cols.all, r.cols.all):
+      assert a.n == b.n and a.miss == b.miss
+      if isinstance(a, Num):
+        assert a.lo == b.lo and a.hi == b.hi
+        assert abs(a.mu - b.mu) < 10**-9 and abs(a.sd - b.sd) < 10**-9
+      else:
+        assert a.seen == b.seen and a.most == b.most
+        assert a.seen[a.mode] == a.most
+    assert len(w.clone(lst[1:]).all) == 50
+    w.extend(lst[1:60])
+    assert w.cols.all[1].lo == min(z[1] for z in w.all)
+    w.save(tmp_path / "rows")
+    r = Rows().load(tmp_path / "rows")
+    assert len(r.all) == 50 and r.cols.all[1].lo == w.cols.all[1].lo
+  for w in [Window(size=50).fromArrays(lst[0], list(zip(*lst[1:]))),
+            Window(size=50).load(tmp_path / "rows")]:
+    w.row(lst[1])
+    assert len(w.all) == 50 and w.cols.all[1].lo == min(z[1] for z in w.all)
+  n, s = Num(), Sym()
+  [(n + x, s + x) for x in [1, 2, 2, 3]]
+  n.dec(2)
+  s.dec(2)
+  assert n.mu == 2 and n.sd == 1 and s.mode in (1, 3) and s.most == 1
+  f = written("auto93.csv", auto93)
+  w = Window(size=50)
+  w.header(Rows(auto93).schema)
+  n = Seen(w)
+  assert Tail(f).update(w, n) == 398 and len(w.all) == 50
+  assert n.n == sum(len(t.all) for t in n.ys.values()) < 398
+
+
+def test_decay(tmp_path, written):
+  random.seed(1)
+  lst = [["$x", "s", "!k"]]
+  for t in range(3000):
+    lst += [[random.gauss(0 if t < 1500 else 10, 1),
+             random.choice("ab" if t < 1500 else "bc"), random.choice("yn")]]
+  d = Decay(lst, decay=.99)
+  x, s = d.cols.all[0], d.cols.all[1]
+  assert len(d.all) == 0 and abs(d.n - 100) < 10**-6
+  assert 9.5 < x.mu < 10.5 and .5 < x.sd < 1.5 and 5 < x.lo < x.hi < 15
+  c = sum(.99**(3000 - 1 - k) for k, z in enumerate(lst[1:]) if z[1] == "c")
+  assert abs(s.count("c") - c) < 10**-6 and s.count("a") < .001
+  Rows(lst).save(tmp_path / "rows")
+  for d2 in [Decay().fromArrays(lst[0], list(zip(*lst[1:]))),
+             Decay().load(tmp_path / "rows")]:
+    assert len(d2.all) == 0 and abs(d2.n - d.n) < 10**-6
+    assert isinstance(d2.cols.all[0], DNum)
+    assert abs(d2.cols.all[0].mu - x.mu) < 10**-6
+    assert abs(d2.cols.all[1].count("c") - c) < 10**-6
+  d2 = Decay([["$x", "s"]] + [["?" if k % 3 else k, "?" if k % 5 else "a"]
+                               for k in range(100)], decay=.9)
+  for col in d2.cols.all:
+    assert abs(col.n + col.miss - d2.n) < 10**-9 and col.miss > col.n
+  n = Seen(Decay(diabetes, decay=.995))
+  [n.train(z) for z in Rows(diabetes).all]
+  assert n.n < 200 and all(len(t.all) == 0 for t in n.ys.values())
+  assert n.guess(Rows(diabetes).all[0])[0] in n.ys
+  f = written("diabetes.csv", diabetes)
+  d = Decay(decay=.995)
+  d.header(Rows(diabetes).schema)
+  n = Seen(d)
+  assert Tail(f).update(d, n) == 768 and 150 < n.n < 200
+  d = Decay(decay=.995)
+  d.header(Rows(diabetes).schema)
+  n, a = Seen(d), Abcd()
+  asyncio.run(pipeline(f, rows=d, seen=n, chunk=512,
+                       out=lambda row, y: a(row[-1], y)))
+  assert 150 < n.n < 200 and a.yes + a.no == 767
+  w = Window(diabetes, size=50)
+  n = trained(w)
+  assert n.n == 50
+
+
+def test_reservoir(tmp_path, written):
+  seed(1)
+  full = Rows(diabetes)
+  r = Reservoir(diabetes, size=100)
+  assert len(r.all) == 100 and r.total() == 768
+  for a, b in zip(r.cols.all, full.cols.all):
+    assert a.n == b.n and getattr(a, "mu", 0) == getattr(b, "mu", 0)
+  s = Reservoir(diabetes, size=50, strata=True)
+  assert sorted(z[-1] for z in s.all) == \
+      ["tested_negative"] * 50 + ["tested_positive"] * 50
+  n = trained(r)
+  assert n.n == 100 and n.guess(full.all[0])[0] in n.ys
+  assert Seen(Window(diabetes, size=50)).n == 0
+  r.bins("tested_positive")
+  at = {id(z): k for k, z in enumerate(full.all)}
+  picks = []
+  for _ in range(100):
+    one = Reservoir(size=20)
+    one.header(full.schema)
+    picks += [at[id(z)] for z in one.extend(full.all).all]
+  assert 300 < sum(picks) / len(picks) < 470
+  f = written("diabetes.csv", diabetes)
+  r = Reservoir(size=50)
+  r.header(full.schema)
+  n = Seen(r)
+  assert Tail(f).update(r, n) == 768 and n.n == 768
+  assert sorted(len(t.all) for t in n.ys.values()) == [50, 50]
+  full.save(tmp_path / "rows")
+  r = Reservoir(size=100).load(tmp_path / "rows")
+  assert len(r.all) == 100 and r.total() == 768
+  assert r.cols.all[1].n == 768 and r.cols.all[1].mu == full.cols.all[1].mu
+  r = Reservoir(size=50)
+  r.header(full.schema)
+  n = Seen(r)
+  asyncio.run(pipeline(f, rows=r, seen=n, chunk=512))
+  assert r.total() == n.n == 768 and len(r.all) == 50
+
+
 def test_tab2():
   r = Rows(auto93)
   bins = r.bins(40.0)
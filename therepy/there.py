@@ -46,14 +46,31 @@ Copyright:
 
 """
 
-from collections import defaultdict
+from collections import defaultdict, Counter, deque
+import io
+import os
 import re
+import bz2
+import codecs
+import asyncio
 import sys
+import gzip
+import json
+import lzma
 import math
+import mmap
 import copy
 import bisect
 import pprint
+import struct
+import hashlib
+import sqlite3
+from array import array
 from docopt import docopt
+from itertools import repeat
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from random import random, seed, choice
 from random import shuffle as rshuffle
 
@@ -70,10 +87,12 @@ def opt(d, **types):
   return o(**d)
 
 
+def clean(s): return re.sub(r'([\n\t\r ]|#.*)', '', s)
 def ako(x, c): return isinstace(x, c)
 def same(x): return x
 def first(a): return a[0]
 def last(a): return a[-1]
+def weight(z): return getattr(z, "w", 1)
 def shuffle(a): rshuffle(a); return a
 
 
@@ -87,7 +106,7 @@ class o:
     "Pretty print. Hide private keys (those starting in `_`)"
     def dicts(x, seen=None):
       if isinstance(x, (tuple, list)):
-        return [dicts(v, seen) for v in i]
+        return [dicts(v, seen) for v in x]
       if isinstance(x, dict):
         return {k: dicts(x[k], seen)
                 for k in x if str(k)[0] != "_"}
@@ -107,19 +126,57 @@ class o:
 
 
 class Col(o):
-  "Summarize columns. Ignore '?' unknown values."
+  "Summarize columns. Ignore (but count, in `miss`) '?' unknown values."
   def __init__(i, pos=0, txt="", w=1, all=[]):
-    i.n, i.w, i.pos, i.txt = 0, w, pos, txt
+    i.n, i.miss, i.w, i.pos, i.txt = 0, 0, w, pos, txt
     i.also()
     [i + x for x in all]
 
   def __add__(i, x):
     if x == "?":
+      i.miss += 1
       return x
     i.n += 1
     i.add(x)
     return x
 
+  def inc(i, x, w=1):
+    "Add `x`, counted `w` times."
+    if x == "?":
+      i.miss += w
+      return x
+    i.n += w
+    i.add(x, w)
+    return x
+
+  def dec(i, x, w=1):
+    "Remove `x` (added before), counted `w` times."
+    if x == "?":
+      i.miss -= w
+      return x
+    i.n -= w
+    i.sub(x, w)
+    return x
+
+  def adds(i, lst):
+    "Add many values."
+    [i + x for x in lst]
+
+  def __getattr__(i, k):
+    "A lazy column (see `Rows`) is summarized when first used."
+    rows = i.__dict__.get("_lazy")
+    if rows is None or k.startswith("__"):
+      raise AttributeError(k)
+    del i._lazy
+    i.n = i.miss = 0
+    i.also()
+    if rows.dups:
+      [i.inc(row[i.pos], row.w) for row in rows.all]
+    else:
+      i.adds([row[i.pos] for row in rows.all])
+    rows._live += [i]
+    return getattr(i, k)
+
   def norm(i, x):
     if x == "?":
       return x
@@ -133,7 +190,7 @@ class Col(o):
 
 class Sample(Col):
   def __init__(i, pos=0, txt="", all=[], enough=30, dull=[.147, .33, .474][0]):
-    i.n, i.pos, i.txt = 0, pos, txt
+    i.n, i.miss, i.pos, i.txt = 0, 0, pos, txt
     i.enough = enough
     i._all = []
     i.sorted = False
@@ -142,8 +199,8 @@ class Sample(Col):
     i.rank = 0
     i._subs = [i]
 
-  def add(i, x):
-    i._all += [x]
+  def add(i, x, w=1):
+    i._all += [x] * w
     i.sorted = False
 
   @property
@@ -221,16 +278,22 @@ def rankSamples(bins):
 
 
 class Num(Col):
-  "Summarize numeric columns"
+  """Summarize numeric columns. If values are removed (by `dec`)
+  in the order they were added, keep `ends` to keep `lo` and `hi`
+  exact (else they are just bounds on what is left)."""
+  ends = None
+
   def also(i, most=sys.maxsize):
     i.mu, i.m2, i.sd, i.lo, i.hi = 0, 0, 0, most, -most
 
-  def add(i, x):
+  def add(i, x, w=1):
     i.lo = min(x, i.lo)
     i.hi = max(x, i.hi)
+    if i.ends is not None:
+      i.ends.add(x)
     d = x - i.mu
-    i.mu += d/i.n
-    i.m2 += d*(x - i.mu)
+    i.mu += w*d/i.n
+    i.m2 += w*d*(x - i.mu)
     if i.m2 < 0:
       i.sd = 0
     elif i.n <= 1:
@@ -238,6 +301,47 @@ class Num(Col):
     else:
       i.sd = (i.m2/(i.n-1))**0.5
 
+  def sub(i, x, w=1):
+    "Undo `add(x, w)` (`n` is already decremented): Welford, reversed."
+    if i.n <= 0:
+      i.n, ends = 0, i.ends
+      i.also()
+      if ends is not None:
+        ends.__init__()
+      return
+    d = x - i.mu
+    i.mu -= w*d/i.n
+    i.m2 -= w*d*(x - i.mu)
+    i.sd = 0 if i.m2 < 0 or i.n <= 1 else (i.m2/(i.n-1))**0.5
+    if i.ends is not None:
+      i.ends.sub(x)
+      i.lo, i.hi = i.ends.lo[0], i.ends.hi[0]
+
+  def adds(i, lst):
+    """Add many values in one pass: summarize them all, then
+    `merge` that summary in (so `sd` is only updated once)."""
+    n, lst = len(lst), [x for x in lst if x != "?"]
+    i.miss += n - len(lst)
+    if lst:
+      j = Num(i.pos, i.txt, i.w)
+      j.n, j.lo, j.hi = len(lst), min(lst), max(lst)
+      j.mu = sum(lst) / j.n
+      j.m2 = sum((x - j.mu)**2 for x in lst)
+      i.merge(j)
+
+  def merge(i, j):
+    """Fold another summary `j` of the same column into this one
+    (using Chan et al.'s pairwise update for `mu` and `m2`)."""
+    n = i.n + j.n
+    if n:
+      d = j.mu - i.mu
+      i.mu += d * j.n / n
+      i.m2 += j.m2 + d * d * i.n * j.n / n
+      i.sd = 0 if i.m2 < 0 or n <= 1 else (i.m2/(n-1))**0.5
+    i.n, i.lo, i.hi = n, min(i.lo, j.lo), max(i.hi, j.hi)
+    i.miss += j.miss
+    return i
+
   def dist1(i, x, y):
     if x == "?":
       y = i.norm(y)
@@ -261,39 +365,232 @@ class Num(Col):
     return (x - i.lo)/(i.hi - i.lo + 10**-64)
 
 
+class DNum(Num):
+  """A `Num` that forgets: each new value scales down the weight of
+  all before it by `decay` (so `n` is the decayed count, and `mu`,
+  `sd` are the decayed mean and deviation). `lo` and `hi` drift
+  back towards `mu` at the same rate, so old extremes fade."""
+  decay = .99
+  adds = Col.adds
+
+  def inc(i, x, w=1):
+    """As for `Col`, but a '?' ages everything before it too. So `miss`
+    is a decayed count, and `n + miss` decays just like the table's
+    `n` (see `Decay`)."""
+    i.miss *= i.decay
+    if x == "?":
+      i.miss += w
+      i.forget()
+      return x
+    return Col.inc(i, x, w)
+
+  def __add__(i, x):
+    return i.inc(x)
+
+  def forget(i):
+    "Scale down the weight of all values so far by `decay`."
+    i.n *= i.decay
+    i.m2 *= i.decay
+    if i.n:
+      i.lo += (1 - i.decay) * (i.mu - i.lo)
+      i.hi -= (1 - i.decay) * (i.hi - i.mu)
+    i.sd = 0 if i.m2 < 0 or i.n <= 1 else (i.m2/(i.n-1))**0.5
+
+  def add(i, x, w=1):
+    i.n -= w
+    i.forget()
+    i.n += w
+    i.lo, i.hi = min(x, i.lo), max(x, i.hi)
+    d = x - i.mu
+    i.mu += w*d/i.n
+    i.m2 += w*d*(x - i.mu)
+    i.sd = 0 if i.m2 < 0 or i.n <= 1 else (i.m2/(i.n-1))**0.5
+
+
+class Ends:
+  """The `lo` and `hi` of a first-in first-out stream of numbers:
+  monotone queues, whose fronts are the smallest (in `lo`) and
+  largest (in `hi`) numbers not yet removed."""
+  def __init__(i):
+    i.lo, i.hi = deque(), deque()
+
+  def add(i, x):
+    while i.lo and i.lo[-1] > x:
+      i.lo.pop()
+    while i.hi and i.hi[-1] < x:
+      i.hi.pop()
+    i.lo.append(x)
+    i.hi.append(x)
+
+  def sub(i, x):
+    "Remove `x`, the oldest number not yet removed."
+    if i.lo[0] == x:
+      i.lo.popleft()
+    if i.hi[0] == x:
+      i.hi.popleft()
+
+
 class Sym(Col):
-  "Summarize symbolic columns"
+  """Summarize symbolic columns. In tables that `intern` their
+  symbols, values are small integer codes into the codebook
+  `words` (and `codes` maps each word back to its code)."""
+  words = codes = None
+
   def also(i):
     i.seen, i.most, i.mode = {}, 0, None
 
-  def add(i, x):
-    i.seen[x] = i.seen.get(x, 0) + 1
+  def add(i, x, w=1):
+    i.seen[x] = i.seen.get(x, 0) + w
     if i.seen[x] > i.most:
       i.most, i.mode = i.seen[x], x
 
+  def adds(i, lst):
+    """Add many values, counting them all at once. `mode` is the
+    same as if they were added one at a time."""
+    n, lst = len(lst), [x for x in lst if x != "?"]
+    i.miss += n - len(lst)
+    new = Counter(lst)
+    i.n += len(lst)
+    for x, n in new.items():
+      i.seen[x] = i.seen.get(x, 0) + n
+    most = max((i.seen[x] for x in new), default=0)
+    if most > i.most:
+      ties = [x for x in new if i.seen[x] == most]
+      mode = ties[0]
+      if len(ties) > 1:  # who got to `most` first?
+        now = {x: i.seen[x] - new[x] for x in ties}
+        for mode in lst:
+          if mode in now:
+            now[mode] += 1
+            if now[mode] == most:
+              break
+      i.most, i.mode = most, mode
+
+  def sub(i, x, w=1):
+    "Undo `add(x, w)`. If that was the `mode`, find the new one."
+    n = i.seen[x] - w
+    if n > 0:
+      i.seen[x] = n
+    else:
+      del i.seen[x]
+    if x == i.mode:
+      i.most, i.mode = 0, None
+      for y, n in i.seen.items():
+        if n > i.most:
+          i.most, i.mode = n, y
+
+  def count(i, x):
+    "Return how often `x` was seen."
+    return i.seen.get(x, 0)
+
+  def merge(i, j):
+    """Fold another summary `j` of the same column into this one.
+    If counts tie, `mode` is the first value seen by `i` then `j`."""
+    i.n += j.n
+    i.miss += j.miss
+    for x, n in j.seen.items():
+      i.seen[x] = i.seen.get(x, 0) + n
+    for x, n in i.seen.items():
+      if n > i.most:
+        i.most, i.mode = n, x
+    return i
+
   def dist1(i, x, y):
     return 0 if x == y else 1
 
   def like(i, x, prior=1, m=1):
     return (i.seen.get(x, 0) + m*prior)/(i.n + m)
 
+  def code(i, x):
+    "Return the code of `x`, adding it to the codebook if new."
+    if x == "?":
+      return x
+    n = i.codes.get(x)
+    if n is None:
+      n = i.codes[x] = len(i.words)
+      i.words.append(x)
+    return n
+
+  def word(i, x):
+    "Return the value coded by `x` (or `x`, if nothing is coded)."
+    return x if x == "?" or x is None or i.words is None else i.words[x]
+
+
+class DSym(Sym):
+  """A `Sym` that forgets: each new value scales down the counts of
+  all before it by `decay`. To keep that O(1), `seen` and `most` hold
+  counts times `g` (which grows by 1/`decay` per value; all are
+  rescaled when `g` gets big). `n` and `count` are decayed counts,
+  and so is `miss` (see `DNum.inc`)."""
+  decay = .99
+  adds, inc, __add__ = Col.adds, DNum.inc, DNum.__add__
+
+  def also(i):
+    super().also()
+    i.g = 1
+
+  def forget(i):
+    "Scale down the weight of all symbols so far by `decay`."
+    i.n *= i.decay
+    i.g /= i.decay
+    if i.g > 10**32:
+      i.seen = {y: n / i.g for y, n in i.seen.items()}
+      i.most, i.g = i.most / i.g, 1
+
+  def add(i, x, w=1):
+    i.n -= w
+    i.forget()
+    i.n += w
+    super().add(x, w * i.g)
+
+  def count(i, x):
+    return i.seen.get(x, 0) / i.g
+
+  def like(i, x, prior=1, m=1):
+    return (i.count(x) + m*prior)/(i.n + m)
+
 
-class Row(o):
+class Row:
   """
   Holds one example from a set of `rows`
   in 'cells' (and, if the row has been descretized,
-  in 'bins').
+  in 'bins'). To keep rows small, they have no `__dict__`
+  and `bins` is just `cells` until some `bin` differs.
+  A row stands for `w` identical examples.
   """
+  __slots__ = ("_rows", "cells", "_bins", "seen", "dom", "w")
+
   def __init__(i, rows, cells):
     i._rows = rows
     i.cells = cells
-    i.bins = cells[:]
+    i._bins = None
     i.seen = False
     i.dom = 0
+    i.w = 1
+
+  def __repr__(i):
+    return repr(o(cells=i.cells, bins=i.bins, seen=i.seen, dom=i.dom,
+                  w=i.w))
 
   def __getitem__(i, k):
     return i.cells[k]
 
+  @property
+  def bins(i):
+    return i.cells if i._bins is None else i._bins
+
+  @bins.setter
+  def bins(i, lst):
+    i._bins = lst
+
+  def bin(i, k, v):
+    "Set bin `k` to `v`, copying `cells` to `bins` on the first change."
+    if i._bins is None:
+      if i.cells[k] == v:
+        return
+      i._bins = i.cells[:]
+    i._bins[k] = v
+
   def better(i, j):
     c = i._rows.cols
     s1, s2, n = 0, 0, len(c.y) + 0.0001
@@ -306,7 +603,7 @@ class Row(o):
 
   def dist(i, j, what="x"):
     d, n = 0, 0
-    for col in i._rows.cols[what]:
+    for col in getattr(i._rows.cols, what):
       a, b = i[col.pos], j[col.pos]
       n += 1
       inc = col.dist(a, b)
@@ -317,29 +614,148 @@ class Row(o):
     return [i[col.pos] for col in i._rows.cols.y]
 
 
+class Sparse(Row):
+  """
+  A `Row` for wide, mostly-missing tables. It stores only the
+  positions `idx` (ascending) and values `vals` of its known
+  cells. `Rows.like` and `dist` just walk those known cells.
+  """
+  __slots__ = ("idx", "vals")
+
+  def __init__(i, rows, cells):
+    i._rows, i._bins, i.seen, i.dom, i.w = rows, None, False, 0, 1
+    i.idx = array("l", (k for k, v in enumerate(cells) if v != "?"))
+    i.vals = [cells[k] for k in i.idx]
+
+  def __getitem__(i, k):
+    p = bisect.bisect_left(i.idx, k)
+    return i.vals[p] if p < len(i.idx) and i.idx[p] == k else "?"
+
+  @property
+  def cells(i):
+    out = ["?"] * len(i._rows.cols.all)
+    for k, v in zip(i.idx, i.vals):
+      out[k] = v
+    return out
+
+  @property
+  def bins(i):
+    return i if i._bins is None else i._bins
+
+  @bins.setter
+  def bins(i, lst):
+    i._bins = lst
+
+  def bin(i, k, v):
+    if i._bins is None:
+      if i[k] == v:
+        return
+      i._bins = i.cells
+    i._bins[k] = v
+
+  def known(i, what="x"):
+    "Yield the known (position, value) pairs of the x (or y) columns."
+    goal = i._rows.schema.goal
+    for k, v in zip(i.idx, i.vals):
+      if goal[k] == (what == "y"):
+        yield k, v
+
+  def dist(i, j, what="x"):
+    if what not in ("x", "y") or not isinstance(j, Sparse):
+      return super().dist(j, what)
+    cols, d, n = i._rows.cols.all, 0, 0
+    other = dict(j.known(what))
+    for k, a in i.known(what):
+      d += cols[k].dist(a, other.pop(k, "?")) ** 2
+      n += 1
+    for k, b in other.items():
+      d += cols[k].dist("?", b) ** 2
+      n += 1
+    m = len(getattr(i._rows.cols, what))
+    return ((d + m - n) / (m + 0.001))**0.5  # cols missing in both: 1
+
+
+class Schema(o):
+  """
+  Column roles, compiled once from a list of column `names` (using
+  the magic characters from `Rows.ch`): which columns to `keep` (the
+  `csv` reader skips the rest), which are `num`eric, which are `goal`s,
+  their weights `w`, and the position of the `klass`. The reader,
+  `Rows.header`, `Rows.clone` and `Seen` all share one `Schema`.
+  """
+  def __init__(i, names):
+    ch = Rows.ch
+    i.names = list(names)
+    i.keep = [n for n, s in enumerate(i.names) if ch.skip not in s]
+    i.num = [s[0] in ch.nums for s in i.names]
+    i.goal = [s[0] in ch.goal for s in i.names]
+    i.w = [-1 if ch.less in s else 1 for s in i.names]
+    i.klass = max((n for n, s in enumerate(i.names) if ch.klass in s),
+                  default=-1)
+
+
 class Rows(o):
   """
   Holds many examples in `rows`.  Also, `cols` stores
   type descriptions for each column (and `cols` is built from the
   names in the first row).
   """
-  def __init__(i, src=None):
+  _live = _keys = None
+  _sparse = _intern = False
+  _all = list
+  dups = 0
+
+  def __init__(i, src=None, lazy=False, dedupe=False, sparse=False,
+               intern=False, **kw):
     """
     Create from `src`, which could be a list,
-    a `.csv` file name, or a string.
+    a `.csv` file name, or a string. Any `kw` options
+    are passed on to the `csv` reader. If `lazy`, each
+    column is only summarized when first used (and then
+    kept up to date, like any other). If `dedupe`, a row
+    identical to an earlier one just adds to that row's
+    weight `w`. Either way, `dups` counts the examples
+    held in `all` beyond `len(all)`. If `sparse`, rows
+    only store their known cells (see `Sparse`). If `intern`,
+    symbols are stored (and summarized, and binned) as small
+    integer codes into each `Sym`'s codebook; `decode` turns
+    them back into words.
     """
-    i.all = []
+    i._live = [] if lazy else None
+    i._sparse, i._intern = sparse, intern
+    i._keys = {} if dedupe else None
+    i.all = i._all()
     i.cols = o(all=[], names={}, klass=None,
                x=[], y=[], syms=[], nums=[])
     if src:
-      [i.add(row) for row in csv(src)]
+      [i.add(row) for row in csv(src, **kw)]
+
+  def options(i):
+    "Return the keywords that make an empty table like this one."
+    return dict(lazy=i._live is not None, dedupe=i._keys is not None,
+                sparse=i._sparse, intern=i._intern)
 
   def clone(i, all=[]):
-    tmp = Rows()
-    tmp.header([col.txt for col in i.cols.all])
+    """Return an empty table like this one, holding `all` (shared, not
+    copied: see `row`)."""
+    tmp = i.__class__(**i.options())
+    if i.cols.all:
+      tmp.header(i.schema)
+      tmp.share(i)
     [tmp.row(one) for one in all]
     return tmp
 
+  def some(i, idx):
+    "Return a zero-copy `Subset` holding the `idx`-th rows of `all`."
+    return Subset(i, idx)
+
+  def total(i):
+    "Return how many examples this table summarizes."
+    return len(i.all) + i.dups
+
+  def tick(i):
+    "Note an example that went to some other table (see `Decay`)."
+
   def add(i, row):
     "The first `row` goes to the header. All the rest got to `rows`."
     i.row(row) if i.cols.all else i.header(row)
@@ -350,27 +766,159 @@ class Rows(o):
 
   def header(i, lst):
     """
-    Using the magic characters from `Rows.ch`, divide the columns
-    into the symbols, the numbers, the x cols, the y cols, the
-    klass col. Also, store them all in the `all` list.
+    Using a `Schema` (compiled from `lst`, unless `lst` already is
+    one), divide the columns into the symbols, the numbers, the x
+    cols, the y cols, the klass col. Also, store them all in the
+    `all` list.
     """
-    c, ch = i.cols, Rows.ch
-    c.klass = -1
-    for pos, txt in enumerate(lst):
-      w = -1 if ch.less in txt else 1
-      col = (Num if txt[0] in ch.nums else Sym)(pos, txt, w)
-      (c.nums if txt[0] in ch.nums else c.syms).append(col)
-      (c.y if txt[0] in ch.goal else c.x).append(col)
-      if ch.klass in txt:
-        c.klass = col
+    c = i.cols
+    i.schema = s = lst if isinstance(lst, Schema) else Schema(lst)
+    for pos, txt in enumerate(s.names):
+      col = i.column(pos, txt, s.w[pos], s.num[pos])
+      (c.nums if s.num[pos] else c.syms).append(col)
+      (c.y if s.goal[pos] else c.x).append(col)
       c.all += [col]
       i.cols.names[txt] = col
+      if i._live is not None:
+        col.__dict__ = dict(pos=pos, txt=txt, w=s.w[pos], _lazy=i)
+      if i._intern and not s.num[pos]:
+        col.words, col.codes = [], {}
+    c.klass = -1 if s.klass < 0 else c.all[s.klass]
+
+  def column(i, pos, txt, w, num):
+    "Return a new summary for column `pos`."
+    return (Num if num else Sym)(pos, txt, w)
+
+  def share(i, other):
+    "Use the same symbol codebooks (and so the same codes) as `other`."
+    for mine, theirs in zip(i.cols.syms, other.cols.syms):
+      mine.words, mine.codes = theirs.words, theirs.codes
+
+  def intern(i, cells):
+    "Return a copy of `cells`, with symbols replaced by their codes."
+    out = list(cells)
+    for col in i.cols.syms:
+      out[col.pos] = col.code(out[col.pos])
+    return out
+
+  def decode(i, cells):
+    "Return a copy of `cells`, with symbol codes replaced by words."
+    out = list(cells)
+    for col in i.cols.syms:
+      out[col.pos] = col.word(out[col.pos])
+    return out
 
   def row(i, z):
-    "add a new row"
-    z = z.cells if isinstance(z, Row) else z
-    [col + val for col, val in zip(i.cols.all, z)]
-    i.all += [Row(i, z)]
+    """Add a new row. A `Row` (e.g. from the table this was `clone`d
+    from) counts as `w` examples, and is shared, not copied: this
+    table just updates its own column summaries and keeps a
+    reference (unless this table does `dedupe`). So a shared row has
+    one `bins`: discretizing either table rewrites it for both.
+    Return the row that stands for this example (kept in `all`, or
+    not)."""
+    if isinstance(z, Row):
+      cells, w = z.cells, z.w
+    else:
+      z = cells = i.intern(z) if i._intern else z
+      w = 1
+    if i._live is None:
+      [col.inc(val, w) for col, val in zip(i.cols.all, cells)]
+    else:
+      [col.inc(cells[col.pos], w) for col in i._live]
+    if i._keys is None:
+      i.dups += w - 1
+      new = z if isinstance(z, Row) else i.store(z)
+      i.all += [new]
+      return new
+    key = tuple(cells)
+    if key in i._keys:  # `_keys` holds positions in `all`
+      old = i.all[i._keys[key]]
+      old.w += w
+      i.dups += w
+      one = copy.copy(old)  # stands for just these `w` examples
+      one.w = w
+      return one
+    # weights change, so deduped tables own their rows
+    i._keys[key] = len(i.all)
+    new = i.store(cells)
+    new.w = w
+    i.dups += w - 1
+    i.all += [new]
+    return new
+
+  def missing(i, pos):
+    """Return a `bytearray` that is 1 for each row of `all` whose cell
+    in column `pos` is '?' (else 0)."""
+    return bytearray(row[pos] == "?" for row in i.all)
+
+  def has(i, pos):
+    """Return the rows of `all` whose cell in column `pos` is known.
+    Columns with no `miss`ing values skip the scan."""
+    if not i.cols.all[pos].miss:
+      return i.all
+    return [row for row in i.all if row[pos] != "?"]
+
+  def store(i, cells):
+    "Wrap new `cells` in a `Row` (or, if `sparse`, a `Sparse` row)."
+    return (Sparse if i._sparse else Row)(i, cells)
+
+  def extend(i, lst):
+    """Add many rows (lists or shared `Row`s), updating each column
+    summary once, with all its new values (see `adds`)."""
+    lst = [z if isinstance(z, Row) else
+           i.intern(z) if i._intern else list(z) for z in lst]
+    if i._keys is not None or any(weight(z) != 1 for z in lst):
+      [i.row(z) for z in lst]
+      return i
+    cells = [z.cells if isinstance(z, Row) else z for z in lst]
+    for col, vals in zip(i.cols.all, zip(*cells)):
+      if "_lazy" not in col.__dict__:
+        col.adds(vals)
+    i.all += [z if isinstance(z, Row) else i.store(z) for z in lst]
+    return i
+
+  def fromArrays(i, names, data):
+    """Fill an empty `Rows` from column `names` and `data`, a list of
+    column arrays (numbers, or '?' for missing)."""
+    i.header(names)
+    if i._keys is not None:
+      return i.extend(zip(*data))
+    if i._intern:
+      data = [[col.code(x) for x in vals] if isinstance(col, Sym) else vals
+              for col, vals in zip(i.cols.all, data)]
+    for col, vals in zip(i.cols.all, data):
+      if "_lazy" not in col.__dict__:
+        col.adds(vals)
+    i.all += [i.store(list(cells)) for cells in zip(*data)]
+    return i
+
+  def fromFrame(i, df):
+    """Fill an empty `Rows` from a pandas `DataFrame` or a structured
+    NumPy array. Column roles come from the column names (as in
+    `Rows.ch`; names with '?' are skipped). NaN or None means '?'."""
+    names, data = frame(df)
+    keep = Schema(names).keep
+    return i.fromArrays([names[n] for n in keep],
+                        [qmarks(data[n]) for n in keep])
+
+  def toArrays(i, bins=False):
+    """Return a dict of NumPy arrays, one per column, holding the
+    `cells` (or, if `bins`, the `bins`) of each row. In numeric
+    columns, '?' becomes NaN."""
+    import numpy as np
+    out = {}
+    for col in i.cols.all:
+      a = [(row.bins if bins else row)[col.pos] for row in i.all]
+      if isinstance(col, Num):
+        out[col.txt] = np.array([math.nan if x == "?" else x for x in a])
+      else:
+        out[col.txt] = np.array(a, dtype=object)
+    return out
+
+  def toFrame(i, bins=False):
+    "Return a pandas `DataFrame` of `toArrays`."
+    import pandas as pd
+    return pd.DataFrame(i.toArrays(bins))
 
   def bins(i, goal=None, cohen=.2):
     """
@@ -378,34 +926,28 @@ class Rows(o):
     `goal=None` then just divide into sqrt(N) bins, that differ
     by more than a small amount (at least `.2*sd`).
     """
-    def apply2Numerics(lst, x):
-      if x == "?":
-        return x
-      for pos, bin in enumerate(lst):
-        if x < bin.xlo:
-          break
-        if bin.xlo <= x < bin.xhi:
-          break
-      return round((pos + 1) / len(lst), 2)
-    # ----------------
-    bins = {}
+    bins, k = {}, i.cols.klass
+    if isinstance(k, Sym) and k.codes is not None:
+      goal = k.codes.get(goal, goal)
     for col in i.cols.nums:
       x = col.pos
-      bins[x] = Bins.nums(i.all, x=x, goal=goal,
-                          cohen=cohen, y=i.cols.klass.pos)
+      bins[x] = Bins.nums(i.has(x), x=x, goal=goal, known=True,
+                          cohen=cohen, y=i.schema.klass)
       for row in i.all:
-        old = row.bins[x]
-        new = apply2Numerics(bins[x], row[x])
-        row.bins[x] = new
+        row.bin(x, Bins.place(bins[x], row[x]))
     for col in i.cols.syms:
       x = col.pos
-      bins[x] = Bins.syms(i.all, x=x, goal=goal,
-                          y=i.cols.klass.pos)
+      bins[x] = Bins.syms(i.has(x), x=x, goal=goal,
+                          y=i.schema.klass)
     return bins
 
   def like(i, row, n, m, k, nh):
-    prior = (len(i.all) + k) / (n + k*nh)
+    prior = (i.total() + k) / (n + k*nh)
     out = math.log(prior)
+    if isinstance(row, Sparse):
+      for pos, val in row.known():
+        out += math.log(i.cols.all[pos].like(val, prior, m))
+      return out
     for col in i.cols.x:
       val = row[col.pos]
       if val != "?":
@@ -413,6 +955,730 @@ class Rows(o):
         out += math.log(inc)
     return out
 
+  magic = b"THERE1"
+
+  def save(i, file, key=None):
+    """
+    Write to a binary columnar `file`: a JSON head (the `key`, the
+    column names and summaries, the symbol codebooks) then one
+    typed array per column (doubles for `Num`s, with NaN for '?';
+    integer codes into the codebook for `Sym`s). Interned symbols
+    are saved as words, so any `Rows` can `load` the file.
+    """
+    head, arrays = dict(key=key, n=len(i.all), dups=i.dups,
+                        order=sys.byteorder, cols=[]), []
+    for col in i.cols.all:
+      col.n  # summarize a lazy column
+      d = {k: v for k, v in col.__dict__.items()  # just the scalar fields
+           if k[0] != "_" and isinstance(v, (int, float, str, type(None)))}
+      vals = [row[col.pos] for row in i.all]
+      if isinstance(col, Sym) and col.words is not None:
+        vals = [col.word(v) for v in vals]
+        d["mode"] = col.word(col.mode)
+      if isinstance(col, Num):
+        arrays += [array("d", (math.nan if v == "?" else v for v in vals))]
+      else:
+        words = {}
+        arrays += [array("i", (words.setdefault(v, len(words))
+                               for v in vals))]
+        d["seen"] = [(col.word(k), n) for k, n in col.seen.items()]
+        d["words"] = list(words)
+      head["cols"] += [d]
+    if i.dups:
+      arrays += [array("d", (row.w for row in i.all))]
+    txt = json.dumps(head).encode()
+    with open(file, "wb") as fp:
+      fp.write(Rows.magic + struct.pack("<Q", len(txt)) + txt)
+      [a.tofile(fp) for a in arrays]
+
+  def load(i, file, key=None):
+    """
+    Fill an empty `Rows` from a `file` written by `save`, without
+    re-parsing or re-summarizing anything. Rows are kept in this
+    table's own way (see `store`). Return `None` if `file` is not a
+    cache, or if it was saved with a different `key`.
+    """
+    with open(file, "rb") as fp:
+      if fp.read(len(Rows.magic)) != Rows.magic:
+        return None
+      head = json.loads(fp.read(struct.unpack("<Q", fp.read(8))[0]))
+      if head["key"] != key:
+        return None
+      i.header([d["txt"] for d in head["cols"]])
+      cols = []
+      for col, d in zip(i.cols.all, head["cols"]):
+        a = array("d" if isinstance(col, Num) else "i")
+        a.fromfile(fp, head["n"])
+        if head["order"] != sys.byteorder:
+          a.byteswap()
+        if isinstance(col, Num):
+          cols += [["?" if x != x else x for x in a]]
+        else:
+          words = d.pop("words")
+          cols += [[words[x] for x in a]]
+          d["seen"] = {k: v for k, v in d["seen"]}
+        d.setdefault("miss", head["n"] + head.get("dups", 0) - d["n"])
+        col.__dict__.update(d)
+        if col.__dict__.pop("_lazy", None) is not None:
+          i._live += [col]  # already summarized
+        if isinstance(col, Sym) and col.codes is not None:
+          col.seen = {col.code(k): n for k, n in col.seen.items()}
+          col.mode = None if col.mode is None else col.code(col.mode)
+      i.all += [i.store(i.intern(cells) if i._intern else list(cells))
+                for cells in zip(*cols)]
+      if head.get("dups"):
+        a = array("d")
+        a.fromfile(fp, head["n"])
+        if head["order"] != sys.byteorder:
+          a.byteswap()
+        for row, w in zip(i.all, a):
+          row.w = int(w) if w == int(w) else w
+        i.dups = head["dups"]
+      if i._keys is not None:
+        i._keys.update((tuple(row.cells), n) for n, row in enumerate(i.all))
+    return i
+
+
+def stamp(file, chunk=2**20):
+  "Key a file by the hash of its contents, and its mtime."
+  h = hashlib.sha1()
+  with open(file, "rb") as fp:
+    for b in iter(lambda: fp.read(chunk), b""):
+      h.update(b)
+  return dict(sha1=h.hexdigest(), mtime=os.stat(file).st_mtime)
+
+
+def cached(src, cache=None, **kw):
+  """Return `Rows(src, **kw)` for a `.csv` file `src`. Reload it
+  from the binary `cache` file (default: `src + '.rows'`) if that was
+  saved from the same `src` contents and mtime, with the same `kw`.
+  Else, parse `src` and (re)write the cache."""
+  cache = cache or src + ".rows"
+  key = dict(stamp(src), kw=repr(sorted(kw.items())))
+  rows = os.path.exists(cache) and Rows(**kw).load(cache, key)
+  if not rows:
+    rows = Rows(src, **kw)
+    rows.save(cache, key)
+  return rows
+
+
+def parallel(file, jobs=None):
+  """Load a `.csv` `file` into `Rows` using `jobs` processes. The
+  file is cut into byte ranges (at line boundaries); each range is
+  parsed and summarized separately, then the column summaries are
+  `merge`d. (Compressed files cannot be cut into byte ranges, so
+  they are loaded serially.)"""
+  if zipped(file):
+    return Rows(file)
+  jobs = jobs or os.cpu_count()
+  with open(file, "rb") as fp:
+    for head in fp:
+      if clean(head.decode()):
+        break
+    lo, size = fp.tell(), os.fstat(fp.fileno()).st_size
+    cuts = [lo]
+    for n in range(1, jobs):
+      fp.seek(max(cuts[-1], lo + (size - lo) * n // jobs))
+      fp.readline()
+      cuts += [fp.tell()]
+  cuts += [size]
+  with ProcessPoolExecutor(jobs) as pool:
+    parts = list(pool.map(parallel1, repeat(file), repeat(head.decode()),
+                          cuts, cuts[1:]))
+  rows = Rows()
+  rows.header(next(csv([head.decode()])))
+  for n, col in enumerate(rows.cols.all):
+    [col.merge(cols[n]) for _, cols in parts]
+  rows.all = [Row(rows, cells) for all, _ in parts for cells in all]
+  return rows
+
+
+def parallel1(file, head, lo, hi):
+  "Parse and summarize bytes `lo` to `hi` of a `.csv` `file`."
+  with open(file, "rb") as fp:
+    fp.seek(lo)
+    rows = Rows([head] + fp.read(hi - lo).decode().splitlines())
+  return [row.cells for row in rows.all], rows.cols.all
+
+
+def frame(df):
+  "Return the names and column arrays of a DataFrame or structured array."
+  if hasattr(df, "columns"):
+    return ([str(x) for x in df.columns],
+            [df.iloc[:, n].to_numpy() for n in range(df.shape[1])])
+  return list(df.dtype.names), [df[x] for x in df.dtype.names]
+
+
+def qmarks(a):
+  "Return a column array as a list, with NaN and None as '?'."
+  return ["?" if x is None or x != x else x for x in a.tolist()]
+
+
+class Columns(Rows):
+  """
+  `Rows` that keep each column in one contiguous typed array
+  (for `Num`s, `floats`: "d" doubles or "f" 4-byte floats, with
+  NaN for '?'; integer codes into a per-column codebook for
+  `Sym`s). `all` holds light `View`s into those arrays, not lists
+  of cells. If `ints`, whole-number `Num` columns are kept as
+  4-byte ints (with `none` for '?'), until some value is not a
+  whole number (then that column turns into `floats`).
+
+  Column summaries (`mu`, `sd`, `lo`, `hi`) are always computed
+  from the values as loaded. With "f", cells read back are rounded
+  to about 7 significant digits, and so are whatever is computed
+  from them: `Num.like`, `dist`, and the cut points of `Bins.nums`.
+  Cells always live in the arrays, so there are no `sparse` or
+  `intern` `Columns`.
+  """
+  none = -2**31
+
+  def __init__(i, src=None, floats="d", ints=False, **kw):
+    for k in ["sparse", "intern"]:
+      if kw.get(k):
+        raise ValueError(f"no {k} Columns")
+    i.data, i.words, i.codes, i.binned = [], [], [], {}
+    i.wrapped, i.floats, i.ints, i.whole = [], floats, ints, set()
+    super().__init__(src, **kw)
+
+  def options(i):
+    return dict(super().options(), floats=i.floats, ints=i.ints)
+
+  def header(i, lst):
+    super().header(lst)
+    for col in i.cols.all:
+      num = isinstance(col, Num)
+      if num and i.ints:
+        i.whole.add(col.pos)
+      i.data += [array("i" if i.ints or not num else i.floats)]
+      i.words += [None if num else []]
+      i.codes += [None if num else {}]
+
+  def number(i, k, val):
+    "Append `val` to the whole-number column `k` (or widen that column)."
+    if val == "?":
+      val = Columns.none
+    elif val != int(val) or not Columns.none < val < 2**31:
+      i.whole.discard(k)
+      i.data[k] = array(i.floats, (math.nan if v == Columns.none else v
+                                   for v in i.data[k]))
+      i.data[k].append(val)
+      return
+    i.data[k].append(int(val))
+
+  def code(i, k, val):
+    "Return the code for `val` in column `k`'s codebook."
+    if val not in i.codes[k]:
+      i.codes[k][val] = len(i.words[k])
+      i.words[k] += [val]
+    return i.codes[k][val]
+
+  def store(i, cells):
+    "Append `cells` to the column arrays. Return a `View` of them."
+    while i.wrapped:  # copy wrapped NumPy arrays before growing them
+      k = i.wrapped.pop()
+      i.data[k] = array(i.floats, i.data[k])
+    n = len(i.data[0]) if i.data else 0
+    for k, val in zip(range(len(i.data)), cells):
+      if k in i.whole:
+        i.number(k, val)
+      elif i.codes[k] is None:
+        i.data[k].append(math.nan if val == "?" else val)
+      else:
+        i.data[k].append(i.code(k, val))
+    return View(i, n)
+
+  def fromFrame(i, df):
+    """As for `Rows`, but float columns are wrapped, not copied, and
+    are summarized with NumPy. They are only copied if rows are
+    added later (or, with "f" `floats`, when first stored). Tables
+    that `dedupe` store each row, as `Rows` does."""
+    if i._keys is not None:
+      return super().fromFrame(df)
+    names, data = frame(df)
+    keep = Schema(names).keep
+    i.header([names[n] for n in keep])
+    for col, n in zip(i.cols.all, keep):
+      k, a = col.pos, data[n]
+      if isinstance(col, Num):
+        a = a.astype("float64", copy=False)
+        i.data[k] = a if i.floats == "d" else a.astype("float32")
+        i.whole.discard(k)
+        i.wrapped += [k]
+        ok = a[a == a]
+        if len(ok):
+          j = Num(k, col.txt, col.w)
+          j.n, j.lo, j.hi = len(ok), float(ok.min()), float(ok.max())
+          j.mu = float(ok.mean())
+          j.m2 = float(((ok - j.mu)**2).sum())
+          col.merge(j)
+        col.miss += len(a) - len(ok)
+      else:
+        vals = qmarks(a)
+        col.adds(vals)
+        i.data[k] = array("i", (i.code(k, x) for x in vals))
+    i.all = [View(i, n) for n in range(len(data[0]) if data else 0)]
+    return i
+
+  def toArrays(i, bins=False):
+    """As for `Rows`. If nothing is discretized or reordered, numeric
+    columns wrapped by `fromFrame` come back as they are (no copies).
+    Other columns are copied: a NumPy view of an `array` would stop
+    it growing while the view lives."""
+    import numpy as np
+    idx = [row.n if isinstance(row, View) and row._rows is i else -1
+           for row in i.all]
+    if (bins and i.binned) or -1 in idx:
+      return super().toArrays(bins)
+    same, out = idx == list(range(len(idx))), {}
+    for col in i.cols.all:
+      k = col.pos
+      if i.codes[k] is None:
+        a = i.data[k]
+        a = np.array(a, "float64") if isinstance(a, array) else \
+            np.asarray(a, "float64")
+        if k in i.whole:
+          a[a == Columns.none] = math.nan
+        out[col.txt] = a if same else a[idx]
+      else:
+        words = np.array(i.words[k], dtype=object)
+        out[col.txt] = words[np.asarray(i.data[k], dtype=np.intc)[idx]]
+    return out
+
+  def cell(i, n, k):
+    "Return the value of column `k` in the `n`-th stored row."
+    v = i.data[k][n]
+    if k in i.whole:
+      return "?" if v == Columns.none else v
+    if i.codes[k] is None:
+      return "?" if v != v else float(v)  # not a NumPy float, if wrapped
+    return i.words[k][v]
+
+
+class View(Row):
+  "A `Row` that reads its cells from a `Columns` table."
+  __slots__ = ("n",)
+
+  def __init__(i, rows, n):
+    i._rows, i.n = rows, n
+    i.seen = False
+    i.dom = 0
+    i.w = 1
+
+  def __getitem__(i, k):
+    return i._rows.cell(i.n, k)
+
+  def __copy__(i):
+    new = View(i._rows, i.n)
+    new.seen, new.dom, new.w = i.seen, i.dom, i.w
+    return new
+
+  @property
+  def cells(i):
+    return [i[k] for k in range(len(i._rows.data))]
+
+  @property
+  def bins(i):
+    return ViewBins(i)
+
+  def bin(i, k, v):
+    ViewBins(i)[k] = v
+
+
+class ViewBins:
+  """The `bins` of a `View`. Columns are copied into the
+  table's `binned` store only when first discretized."""
+  def __init__(i, row):
+    i.row = row
+
+  def __getitem__(i, k):
+    col = i.row._rows.binned.get(k)
+    return i.row[k] if col is None else col[i.row.n]
+
+  def __setitem__(i, k, v):
+    rows = i.row._rows
+    if k not in rows.binned:
+      rows.binned[k] = [rows.cell(n, k) for n in range(len(rows.data[k]))]
+    rows.binned[k][i.row.n] = v
+
+
+class Stream(Rows):
+  """
+  `Rows` that must see each example, in order, as it arrives (see
+  `Window`, `Decay`, `Reservoir`). So every way of filling one
+  (`extend`, `fromArrays`, `fromFrame`, `load`) goes through `row`.
+  Rows are never deduped, and columns are never lazy.
+  """
+  def __init__(i, src=None, **kw):
+    kw["lazy"] = kw["dedupe"] = False
+    super().__init__(src, **kw)
+
+  def extend(i, lst):
+    [i.row(z) for z in lst]
+    return i
+
+  def fromArrays(i, names, data):
+    i.header(names)
+    return i.extend(zip(*data))
+
+  def load(i, file, key=None):
+    "Replay the rows of a `save`d `file` through `row` (see `Rows.load`)."
+    tmp = Rows().load(file, key)
+    if tmp is None:
+      return None
+    i.header(tmp.schema)
+    for one in tmp.all:
+      new = i.store(i.intern(one.cells) if i._intern else one.cells)
+      new.w = one.w
+      i.row(new)
+    return i
+
+
+class Window(Stream):
+  """
+  `Rows` that only hold the last `size` rows. Once full, each new row
+  pushes out the oldest, whose values are taken out of the column
+  summaries (see `dec`), so memory and the cost of each update stay
+  the same however long the stream.
+  """
+  _all = deque
+
+  def __init__(i, src=None, size=1024, **kw):
+    i.size = size
+    super().__init__(src, **kw)
+
+  def options(i):
+    return dict(super().options(), size=i.size)
+
+  def header(i, lst):
+    super().header(lst)
+    for col in i.cols.nums:
+      col.ends = Ends()
+
+  def row(i, z):
+    new = super().row(z)
+    if len(i.all) > i.size:
+      old = i.all.popleft()
+      [col.dec(old[col.pos], old.w) for col in i.cols.all]
+      i.dups -= old.w - 1
+    return new
+
+
+class Decay(Stream):
+  """
+  `Rows` for drifting streams, that keep no rows: just `DNum` and
+  `DSym` column summaries, and a count `n` of examples, where each
+  new example scales down the weight of all before it by `decay`.
+  So memory stays the same however long the stream, and `like` (and
+  `Seen`) favor recent examples. With no rows, there are no `bins`.
+  """
+  _all = partial(deque, maxlen=0)
+
+  def __init__(i, src=None, decay=.99, **kw):
+    i.decay, i.n = decay, 0
+    super().__init__(src, **kw)
+
+  def options(i):
+    return dict(super().options(), decay=i.decay)
+
+  def column(i, pos, txt, w, num):
+    col = (DNum if num else DSym)(pos, txt, w)
+    col.decay = i.decay
+    return col
+
+  def total(i):
+    return i.n
+
+  def tick(i):
+    i.n *= i.decay
+
+  def row(i, z):
+    i.n = i.n * i.decay + weight(z)
+    return super().row(z)
+
+
+class Reservoir(Stream):
+  """
+  `Rows` for inputs too big to hold. The column summaries cover
+  every row, but `all` only keeps a uniform random sample of `size`
+  rows (or, if `strata`, of `size` rows per `klass` value), so
+  `bins`, `Seen` and `dist` can run on that sample in bounded memory.
+  Each row (whatever its weight) is one draw.
+  """
+  def __init__(i, src=None, size=1024, strata=False, **kw):
+    i.size, i.strata, i.n, i._at, i._seen = size, strata, 0, {}, {}
+    super().__init__(src, **kw)
+
+  def options(i):
+    return dict(super().options(), size=i.size, strata=i.strata)
+
+  def total(i):
+    return i.n
+
+  def row(i, z):
+    "Summarize every row. Keep it with probability `size`/(rows seen)."
+    new = super().row(z)
+    i.all.pop()
+    i.n += new.w
+    y = new[i.schema.klass] if i.strata and i.schema.klass >= 0 else None
+    at, seen = i._at.setdefault(y, []), i._seen.get(y, 0) + 1
+    i._seen[y] = seen
+    if len(at) < i.size:
+      at.append(len(i.all))
+      i.all.append(new)
+    else:
+      j = int(random() * seen)
+      if j < i.size:
+        i.all[at[j]] = new
+    return new
+
+
+class Subset(Rows):
+  """
+  `Rows` holding just the `idx`-th rows of some `parent`. Nothing is
+  copied: `idx` is an array of positions in `parent.all`, and the
+  column summaries in `cols` are only built when first used. So the
+  `parent` cannot be a `Stream`, whose rows move.
+  """
+  def __init__(i, parent, idx=()):
+    if isinstance(parent, Subset):
+      idx = [parent.idx[n] for n in idx]
+      parent = parent._parent
+    if isinstance(parent, Stream):
+      raise TypeError(f"no Subset of a {parent.__class__.__name__}")
+    i._parent, i._cols, i._n = parent, None, None
+    i.idx = array("l", idx)
+    i.schema = parent.schema
+
+  @property
+  def all(i):
+    return Pick(i._parent.all, i.idx)
+
+  @property
+  def cols(i):
+    if i._cols is None:
+      tmp = Rows()
+      tmp.header(i.schema)
+      tmp.share(i._parent)
+      i._n = 0
+      for row in i.all:
+        [col.inc(val, row.w) for col, val in zip(tmp.cols.all, row.cells)]
+        i._n += row.w
+      i._cols = tmp.cols
+    return i._cols
+
+  def total(i):
+    "Return the weight of these rows (counted once, then kept up to date)."
+    if i._n is None:
+      i._n = sum(row.w for row in i.all)
+    return i._n
+
+  def clone(i, all=[]):
+    return i._parent.clone(all)
+
+  def extend(i, lst):
+    [i.row(z) for z in lst]
+    return i
+
+  def row(i, z):
+    """Add a row to the parent, and to this subset. If the parent
+    dedupes it into an older row, this subset holds that row."""
+    n, keys = len(i._parent.all), i._parent._keys
+    new = i._parent.row(z)
+    if keys is None or len(i._parent.all) > n:
+      i.idx.append(len(i._parent.all) - 1)
+    elif keys[tuple(new.cells)] not in i.idx:
+      i.idx.append(keys[tuple(new.cells)])
+    if i._cols:
+      [col.inc(val, new.w) for col, val in zip(i._cols.all, new.cells)]
+    if i._n is not None:
+      i._n += new.w
+    return new
+
+
+class Pick:
+  "A read-only list of the `idx`-th items of `lst`."
+  def __init__(i, lst, idx):
+    i.lst, i.idx = lst, idx
+
+  def __len__(i):
+    return len(i.idx)
+
+  def __iter__(i):
+    return (i.lst[n] for n in i.idx)
+
+  def __getitem__(i, k):
+    if isinstance(k, slice):
+      return [i.lst[n] for n in i.idx[k]]
+    return i.lst[i.idx[k]]
+
+
+class Sqlite(Rows):
+  """
+  `Rows` whose rows live in a SQLite `db` file (by default, a
+  temporary database that SQLite spills to disk, and deletes when
+  closed). Only the column summaries are held in memory. `all` is a
+  read-only sequence that reads rows back `page` at a time, so
+  `Seen` and `like` can stream over tables bigger than RAM (and
+  `bins` holds just one column's sorted values at a time).
+  Each column `k` is stored as `c<k>` (and its discretized bin, if
+  any, as `b<k>`), with NULL for '?'. Each row's weight is stored
+  as `w`.
+  """
+  def __init__(i, src=None, db="", page=4096, **kw):
+    i.db, i.page, i.n, i._new = db, page, 0, []
+    i._sql = sqlite3.connect(db)
+    i.cols = o(all=[], names={}, klass=None,
+               x=[], y=[], syms=[], nums=[])
+    if src:
+      [i.add(row) for row in csv(src, **kw)]
+
+  @property
+  def all(i):
+    return Pages(i)
+
+  def clone(i, all=[]):
+    tmp = Sqlite(page=i.page)
+    if i.cols.all:
+      tmp.header(i.schema)
+    tmp.extend(all)
+    return tmp
+
+  def header(i, lst):
+    super().header(lst)
+    w = range(len(i.cols.all))
+    cs = ", ".join([f"c{k}" for k in w] + [f"b{k}" for k in w])
+    i._sql.execute(f"create table rows (id integer primary key, w, {cs})")
+    i._put = "insert into rows (w, %s) values (?, %s)" % (
+        ", ".join(f"c{k}" for k in w), ", ".join("?" for k in w))
+    i._get = f"select id, w, {cs} from rows"
+
+  def row(i, z):
+    "Add a new row (to the buffer of rows waiting to be written)."
+    new = z if isinstance(z, Row) else Row(i, list(z))
+    [col.inc(v, new.w) for col, v in zip(i.cols.all, new.cells)]
+    i._new += [[new.w] + [None if v == "?" else v for v in new.cells]]
+    i.n += 1
+    i.dups += new.w - 1
+    if len(i._new) >= i.page:
+      i.flush()
+    return new
+
+  def extend(i, lst):
+    cells = [z.cells if isinstance(z, Row) else list(z) for z in lst]
+    ws = [weight(z) for z in lst]
+    if any(w != 1 for w in ws):
+      for z, w in zip(cells, ws):
+        [col.inc(v, w) for col, v in zip(i.cols.all, z)]
+    else:
+      for col, vals in zip(i.cols.all, zip(*cells)):
+        col.adds(vals)
+    i._new += [[w] + [None if v == "?" else v for v in z]
+               for z, w in zip(cells, ws)]
+    i.n += len(cells)
+    i.dups += sum(ws) - len(cells)
+    if len(i._new) >= i.page:
+      i.flush()
+    return i
+
+  def fromArrays(i, names, data):
+    i.header(names)
+    return i.extend(zip(*data))
+
+  def flush(i):
+    "Write any buffered rows."
+    if i._new:
+      i._sql.executemany(i._put, i._new)
+      i._sql.commit()
+      i._new = []
+
+  def close(i):
+    i.flush()
+    i._sql.close()
+
+  def pages(i):
+    "Yield all rows, reading `page` rows per query."
+    i.flush()
+    last = 0
+    while True:
+      got = i._sql.execute(i._get + " where id > ? order by id limit ?",
+                           (last, i.page)).fetchall()
+      if not got:
+        return
+      for one in got:
+        yield i.revive(one)
+      last = got[-1][0]
+
+  def revive(i, one):
+    "Make a `Row` from one record of `rows`."
+    w = len(i.cols.all)
+    cells = ["?" if v is None else v for v in one[2:w + 2]]
+    row = Row(i, cells)
+    row.w = one[1]
+    if any(b is not None for b in one[w + 2:]):
+      row.bins = [c if b is None else b for c, b in zip(cells, one[w + 2:])]
+    return row
+
+  def bins(i, goal=None, cohen=.2):
+    """As for `Rows`, but each column is discretized from just its
+    own (and the klass) values, fetched in sorted order by SQLite.
+    Bins are written back to `b<k>` inside SQLite. Symbols are
+    streamed from the cursor. Numeric columns need random access to
+    their sorted values, so each one (just its (value, klass) pairs,
+    one column at a time) is held in memory while it is binned."""
+    i.flush()
+    bins, y = {}, i.schema.klass % len(i.cols.all)
+    for col in i.cols.all:
+      x = col.pos
+      sym = isinstance(col, Sym)
+      order = "id" if sym else f"c{x}, id"
+      lst = i._sql.execute(
+          f"select c{x}, coalesce(c{y}, '?'), w from rows "
+          f"where c{x} is not null order by {order}")
+      if i.dups:
+        lst = map(Sqlite.Hit, lst)
+      if sym:
+        bins[x] = Bins.syms(lst, x=0, y=1, goal=goal)
+      else:
+        bins[x] = Bins.nums(list(lst), x=0, y=1, goal=goal,
+                            cohen=cohen, known=True, ordered=True)
+        i._sql.create_function("place", 1,
+                               lambda v, b=bins[x]: Bins.place(b, v))
+        i._sql.execute(f"update rows set b{x} = place(c{x}) "
+                       f"where c{x} is not null")
+      for bin in bins[x]:
+        bin.x = x
+    i._sql.commit()
+    return bins
+
+
+  class Hit(tuple):
+    "A (value, klass, weight) record, as read by `bins`."
+    w = property(itemgetter(2))
+
+
+class Pages:
+  "The read-only `all` of a `Sqlite` table."
+  def __init__(i, rows):
+    i.rows = rows
+
+  def __len__(i):
+    return i.rows.n
+
+  def __iter__(i):
+    return i.rows.pages()
+
+  def __getitem__(i, k):
+    if isinstance(k, slice):
+      return [i[j] for j in range(*k.indices(len(i)))]
+    k = k + len(i) if k < 0 else k
+    if not 0 <= k < len(i):
+      raise IndexError(k)
+    i.rows.flush()
+    one = i.rows._sql.execute(i.rows._get + " where id = ?",
+                              (k + 1,)).fetchone()
+    return i.rows.revive(one)
+
 
 class Bin(o):
   """A `bin` is a core data structure in DUO. It
@@ -450,13 +1716,24 @@ class Bin(o):
       k.ys[x] = v + k.ys.get(x, 0)
     return k
 
-  def inc(i, y, want):
+  def inc(i, y, want, w=1):
     k = y == want
-    i.ys[k] = i.ys.get(k, 0) + 1
+    i.ys[k] = i.ys.get(k, 0) + w
 
 
 class Bins:
   "Bins is a farcade holding code to manage `bin`s."
+  def place(lst, x):
+    "Return where, in the numeric bins `lst`, `x` falls (as 0..1)."
+    if x == "?":
+      return x
+    for pos, bin in enumerate(lst):
+      if x < bin.xlo:
+        break
+      if bin.xlo <= x < bin.xhi:
+        break
+    return round((pos + 1) / len(lst), 2)
+
   def syms(lst, x=0, y=-1, goal=None):
     "Return bins for columns of symbols."
     all = Bin(x=x)
@@ -467,33 +1744,37 @@ class Bins:
         if xx not in bins:
           bins[xx] = Bin(xx, x)
         now = bins[xx]
-        now.inc(yy, goal)
-        all.inc(yy, goal)
+        now.inc(yy, goal, weight(z))
+        all.inc(yy, goal, weight(z))
     return [bin.score(all) for bin in bins.values()]
 
   def nums(lst, x=0, y=-1, goal=None, cohen=.3,
-           enough=.5, trivial=.05):
+           enough=.5, trivial=.05, known=False, ordered=False):
     """
     Return bins for columns of numbers. Combine two bins if
     they are separated by too small amount or if
-    they predict poorly for the goal.
+    they predict poorly for the goal. Sizes count each row
+    as its `weight`. If `known`, no `x` value in `lst` is '?'. If
+    `ordered`, `lst` is already sorted on `x` (so it is not copied).
     """
     def split():
-      xlo, bins, n = 0, [Bin(0, x)], len(lst)**enough
-      while n < 4 and n < len(lst) / 2:
+      big = sum(weight(z) for z in lst)
+      lo, had, bins, n = 0, 0, [Bin(0, x)], big**enough
+      while n < 4 and n < big / 2:
         n *= 1.2
       for xhi, z in enumerate(lst):
         xx, yy = z[x], z[y]
-        if xhi - xlo >= n:  # split when big enough
-          if len(lst) - xhi >= n:  # split when enough remains after
+        if had - lo >= n:  # split when big enough
+          if big - had >= n:  # split when enough remains after
             if xx != lst[xhi - 1][x]:  # split when values differ
               bins += [Bin(xhi, x)]
-              xlo = xhi
+              lo = had
         now = bins[-1]
         now.xhi = xhi + 1
         all.xhi = xhi + 1
-        now.inc(yy, goal)
-        all.inc(yy, goal)
+        now.inc(yy, goal, weight(z))
+        all.inc(yy, goal, weight(z))
+        had += weight(z)
       return [bin.score(all) for bin in bins]
 
     def merge(bins):
@@ -504,7 +1785,7 @@ class Bins:
           b = bins[j + 1]
           ab = (a + b).score(all)
           tooLittleDifference = (mid(b) - mid(a)) < cohen
-          notBetterForGoal = goal and ab.val >= a.val and ab.val >= b.val
+          notBetterForGoal = goal is not None and ab.val >= a.val and ab.val >= b.val
           if tooLittleDifference or notBetterForGoal:
             a = ab
             j += 1
@@ -517,7 +1798,9 @@ class Bins:
     def n(z): return lst[min(len(lst) - 1, z)][x]
     def finalize(z): z.xlo, z.xhi = n(z.xlo), n(z.xhi); return z
     # --------------------------------------------------------------
-    lst = sorted((z for z in lst if z[x] != "?"), key=lambda z: z[x])
+    if not ordered:
+      lst = sorted(lst if known else (z for z in lst if z[x] != "?"),
+                   key=itemgetter(x))
     all = Bin(0, x)
     cohen = cohen * (per(.9) - per(.1)) / 2.54
     return [finalize(bin) for bin in merge(split())]
@@ -538,30 +1821,32 @@ class Abcd:
     i.d = {}
     i.all = {}
 
-  def __call__(i, actual, predict):
-    i.knowns(actual)
-    i.knowns(predict)
+  def __call__(i, actual, predict, w=1):
+    "Count one `actual`, `predict`ion pair (as `w` pairs)."
+    i.knowns(actual, w)
+    i.knowns(predict, w)
     if actual == predict:
-      i.yes += 1
+      i.yes += w
     else:
-      i.no += 1
+      i.no += w
     for x in i.known:
       if actual == x:
         if predict == actual:
-          i.d[x] += 1
+          i.d[x] += w
         else:
-          i.b[x] += 1
+          i.b[x] += w
       else:
         if predict == x:
-          i.c[x] += 1
+          i.c[x] += w
         else:
-          i.a[x] += 1
+          i.a[x] += w
 
-  def knowns(i, x):
-    if not x in i.known:
+  def knowns(i, x, w=1):
+    new = x not in i.known
+    if new:
       i.known[x] = i.a[x] = i.b[x] = i.c[x] = i.d[x] = 0.0
-    i.known[x] += 1
-    if (i.known[x] == 1):
+    i.known[x] += w
+    if new:
       i.a[x] = i.yes + i.no
 
   def report(i, goal=None, cache=None):
@@ -611,19 +1896,24 @@ class Abcd:
 class Seen(o):
   def __init__(i,  rows, m=2, k=1):
     i.rows, i.m, i.k = rows, m, k
-    i.ys, i.n = {}, 0
+    i.ys = {}
+
+  @property
+  def n(i):
+    "The number of examples trained on (or, if `Decay`ed, their weight)."
+    return sum(rows.total() for rows in i.ys.values())
 
   def train(i, row):
-    y = row[i.rows.cols.klass.pos]
+    y = row[i.rows.schema.klass]
     if y not in i.ys:
       i.ys[y] = i.rows.clone()
-    i.n += 1
+    [rows.tick() for z, rows in i.ys.items() if z != y]
     i.ys[y].row(row)
 
   def guess(i, row):
-    all, ybest, most = [], None, -10**64
+    all, ybest, most, n = [], None, -10**64, i.n
     for y in i.ys:
-      tmp = i.ys[y].like(row, i.n, i.m, i.k, len(i.ys))
+      tmp = i.ys[y].like(row, n, i.m, i.k, len(i.ys))
       all += [[tmp, y, row]]
       if tmp > most:
         ybest, most = y, tmp
@@ -657,10 +1947,173 @@ class Seen(o):
     return [last(one) for one in scores]
 
 
-def csv(src=None, f=sys.stdin):
+class Tail(o):
+  """
+  Follow an append-only `.csv` `file`. Each pass over a `Tail` yields
+  just the rows appended since the last pass (the first pass also
+  yields the header). Only complete lines are read; a half-written
+  last line waits for the next pass.
+  """
+  def __init__(i, file):
+    i.file, i.at, i.head = file, 0, None
+
+  def __iter__(i):
+    with open(i.file, "rb") as fp:
+      fp.seek(i.at)
+      txt = fp.read()
+    cut = txt.rfind(b"\n") + 1
+    i.at += cut
+    lines, first = txt[:cut].decode().splitlines(), i.head is None
+    if first:
+      for n, line in enumerate(lines):
+        if clean(line):
+          i.head, lines = line, lines[n + 1:]
+          break
+      else:
+        return
+    for n, row in enumerate(csv([i.head] + lines)):
+      if n or first:
+        yield row
+
+  def update(i, rows, seen=None):
+    """Add the new rows to `rows` (which should start empty, or with
+    the same header) and, if given, `train` a `Seen` on them. Return
+    the number of new rows."""
+    n, head = 0, i.head is None
+    for row in i:
+      if head:  # the first pass starts with the header
+        head = False
+        if not rows.cols.all:
+          rows.header(row)
+        continue
+      new = rows.row(row)
+      n += 1
+      if seen:
+        seen.train(new)
+    return n
+
+
+async def batches(src=None, chunk=2**16):
+  """Yield lists of complete lines read from a file name, an
+  `asyncio.StreamReader` (e.g. from `asyncio.open_unix_connection`),
+  or (if `src` is `None`) stdin. File reads run in a thread, so
+  they overlap with work done elsewhere in the event loop."""
+  loop = asyncio.get_running_loop()
+  if src is None:
+    src = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(src), sys.stdin)
+  if isinstance(src, str):
+    fp = opens(src)
+    async def read(): return await loop.run_in_executor(None, fp.read, chunk)
+  else:
+    fp, utf8 = None, codecs.getincrementaldecoder("utf-8")()
+    async def read(): return utf8.decode(await src.read(chunk))
+  try:
+    tail = ""
+    while True:
+      txt = await read()
+      if not txt:
+        break
+      lines = (tail + txt).split("\n")
+      tail = lines.pop()
+      yield lines
+    if tail:
+      yield [tail]
+  finally:
+    if fp:
+      fp.close()
+
+
+async def pipeline(src=None, rows=None, seen=None, bins=None, out=None,
+                   train=True, size=8, chunk=2**16):
+  """
+  Read `src` (see `batches`) into `rows` in three stages, linked by
+  queues holding at most `size` batches (so a slow consumer stalls
+  the reader): read lines; parse them (with `csv`); then add each
+  row to `rows`, discretize it using `bins` (from `Rows.bins`), call
+  `out(row, guess)` with `seen`'s guess for its class, and `train`
+  `seen` on it. Return `rows` (by default, `seen.rows`).
+  """
+  rows = rows or (seen.rows if seen else Rows())
+  q1, q2 = asyncio.Queue(size), asyncio.Queue(size)
+
+  async def read():
+    async for lines in batches(src, chunk):
+      await q1.put(lines)
+    await q1.put(None)
+
+  async def parse(head=None):
+    while True:
+      lines = await q1.get()
+      if lines is None:
+        break
+      if head is None:
+        while lines and not clean(lines[0]):
+          lines.pop(0)
+        if not lines:
+          continue
+        head, lines = lines[0], lines[1:]
+        if not rows.cols.all:
+          rows.header(next(csv([head])))
+      await q2.put(list(csv([head] + lines))[1:])
+    await q2.put(None)
+
+  async def learn():
+    while True:
+      lst = await q2.get()
+      if lst is None:
+        break
+      for cells in lst:
+        row = rows.row(cells)
+        for x, b in (bins or {}).items():
+          if rows.schema.num[x]:
+            row.bin(x, Bins.place(b, row[x]))
+        if seen:
+          if out and seen.n:
+            out(row, seen.guess(row)[0])
+          if train:
+            seen.train(row)
+  # ---------------------------------
+  await asyncio.gather(read(), parse(), learn())
+  return rows
+
+
+zips = {b"\x1f\x8b": gzip.open, b"BZh": bz2.open, b"\xfd7zXZ\x00": lzma.open}
+
+
+def zipped(file):
+  "If `file`'s magic bytes say it is compressed, return its opener."
+  with open(file, "rb") as fp:
+    magic = fp.read(6)
+  for k, f in zips.items():
+    if magic.startswith(k):
+      return f
+
+
+def opens(file, buffer=2**20):
+  "Open a text `file` (decompressing gzip, bz2 or xz) with a big read buffer."
+  f = zipped(file)
+  if f:
+    return io.TextIOWrapper(io.BufferedReader(f(file, "rb"), buffer))
+  return open(file, buffering=buffer)
+
+
+def csv(src=None, f=sys.stdin, bulk=False, chunk=2**20, mapped=False,
+        use=None, where=None):
   """Read from stdio or file or string or list.  Kill whitespace or
   comments. Coerce number strings to numbers."Ignore columns if,
-  on line one, the name contains '?'."""
+  on line one, the name contains '?'. If `bulk`, then strings and
+  files are read `chunk` characters at a time, and each chunk
+  is cleaned and coerced all at once, one column at a time (same
+  rows, less per-line overhead). If `mapped`, files are memory-mapped
+  and row boundaries are found directly in the mapped buffer.
+  Files ending in `.csv.gz`, `.csv.bz2` or `.csv.xz` (or any file
+  whose magic bytes say it is compressed) are decompressed as they
+  are read. If `use` is a list of column names, only those columns
+  are returned (in file order). `where` maps column names to tests
+  (a function, a `(lo,hi)` range, or a value to match): rows that
+  fail any test are dropped before their other cells are coerced."""
   def items(z):
     for y in z:
       yield y
@@ -670,14 +2123,14 @@ def csv(src=None, f=sys.stdin):
       yield y
 
   def csv(z):
-    with open(z) as fp:
+    with opens(z) as fp:
       for y in fp:
         yield y
 
   def rows(z):
     for y in f(z):
       if isinstance(y, str):
-        y = re.sub(r'([\n\t\r ]|#.*)', '', y).strip()
+        y = clean(y).strip()
         if y:
           yield y.split(",")
       else:
@@ -685,27 +2138,129 @@ def csv(src=None, f=sys.stdin):
 
   def floats(a): return a if a == "?" else float(a)
 
+  def test(want):
+    "Compile a `where` test."
+    if callable(want):
+      return want
+    if isinstance(want, tuple):
+      lo, hi = want
+      return lambda x: x != "?" and lo <= x <= hi
+    return lambda x: x == want
+
+  def compile(head):
+    "Return the `Schema`, the columns to keep, and the `where` tests."
+    s, tests = Schema(head), []
+    keep = [n for n in s.keep if not use or head[n] in use]
+    for n, x in enumerate(head):
+      if x in (where or {}):
+        tests += [(n, floats if s.num[n] else str, test(where[x]))]
+    return s, keep, tests
+
   def nums(z):
-    funs, num = None, Rows.ch.nums
+    "Line one compiles a `Schema`; the rest are tested, projected, coerced."
+    funs = tests = None
     for a in z:
-      if funs:
-        yield [fun(a1) for fun, a1 in zip(funs, a)]
+      if funs is not None:
+        if all(t(fun(a[n])) for n, fun, t in tests):
+          yield [fun(a[n]) for n, fun in funs]
       else:
-        funs = [floats if a1[0] in num else str for a1 in a]
-        yield a
-
-  def cols(src, todo=None):
-    for a in src:
-      todo = todo or [n for n, a1 in enumerate(a) if "?" not in a1]
-      yield [a[n] for n in todo]
+        s, keep, tests = compile(a)
+        funs = [(n, floats if s.num[n] else str) for n in keep]
+        yield [a[n] for n in keep]
+
+  def maps(z, step=None):
+    """Yield lines from a memory-mapped file or, given a `step`, blocks
+    of text cut at the first newline after every `step` bytes."""
+    with open(z, "rb") as fp:
+      if not os.fstat(fp.fileno()).st_size:
+        return
+      with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        if not step:
+          for y in iter(buf.readline, b""):
+            yield y.decode()
+          return
+        lo, n = 0, len(buf)
+        while lo < n:
+          hi = n if lo + step >= n else buf.rfind(b"\n", lo, lo + step) + 1
+          if hi <= lo:
+            hi = buf.find(b"\n", lo + step) + 1 or n
+          yield buf[lo:hi].decode()
+          lo = hi
+
+  def texts(fp):
+    "Yield text from a file object, cut at newlines, `chunk` at a time."
+    tail = ""
+    while tail is not None:
+      txt = fp.read(chunk)
+      if txt:
+        txt = tail + txt
+        cut = txt.rfind("\n") + 1
+        txt, tail = txt[:cut], txt[cut:]
+      else:
+        txt, tail = tail, None
+      yield txt
+
+  def blocks(z):
+    "Yield lists of split lines, one list per block of text."
+    blank = str.maketrans("", "", "\t\r ")
+    for txt in z:
+      if "#" in txt:
+        txt = re.sub(r'#.*', '', txt)
+      txt = txt.translate(blank)
+      yield [y.split(",") for y in txt.split("\n") if y]
+
+  def floats1(a):
+    "Coerce a whole column; only go cell by cell if there is a '?'."
+    try:
+      return list(map(float, a))
+    except ValueError:
+      return [floats(a1) for a1 in a]
+
+  def bulks(z):
+    get = None
+    for lst in z:
+      if not lst:
+        continue
+      if not get:
+        head, lst = lst[0], lst[1:]
+        s, keep, tests = compile(head)
+        get = itemgetter(*keep) if len(keep) > 1 else \
+            (lambda a: (a[keep[0]],))
+        funs = [n for n, m in enumerate(keep) if s.num[m]]
+        yield [head[n] for n in keep]
+      if tests:
+        lst = [a for a in lst
+               if all(t(fun(a[n])) for n, fun, t in tests)]
+      if not keep:  # no columns kept, so just one empty row per line
+        for _ in lst:
+          yield []
+        continue
+      if not lst:
+        continue
+      a = list(zip(*map(get, lst)))
+      for n in funs:
+        a[n] = floats1(a[n])
+      for row in map(list, zip(*a)):
+        yield row
 
   if src:
     if isinstance(src, (list, tuple)):
       f = items
     elif isinstance(src, str):
-      if src[-3:] == 'csv':
-        f = csv
+      file = re.search(r'csv(\.(gz|bz2|xz))?$', src)
+      mapped = mapped and file and not zipped(src)
+      if bulk and mapped:
+        for row in bulks(blocks(maps(src, chunk))):
+          yield row
+        return
+      if bulk:
+        with (opens(src) if file else io.StringIO(src)) as fp:
+          for row in bulks(blocks(texts(fp))):
+            yield row
+        return
+      if file:
+        f = maps if mapped else csv
       else:
         f = strings
-  for row in nums(cols(rows(src))):
+  for row in nums(rows(src)):
     yield row